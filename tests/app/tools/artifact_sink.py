@@ -0,0 +1,323 @@
+# app/tools/artifact_sink.py
+
+import atexit
+import csv
+import json
+import math
+import os
+import queue
+import stat
+import sys
+import tempfile
+import threading
+import time
+from functools import partial
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+# --- Fast Encoder (optional) ---
+# orjson is several times faster than the stdlib encoder on large payloads.
+# Fall back to `json` so the workflow still runs when it is not installed.
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+
+def _to_serializable(obj: Any) -> Any:
+    """Fallback hook for objects the encoder does not know (e.g. Pydantic models)."""
+    if hasattr(obj, 'model_dump'):
+        return obj.model_dump()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _normalize(obj: Any) -> Any:
+    """
+    Applies orjson's rules for the stdlib fallback: NaN/Infinity become null
+    (missing catalog fields read by pandas are NaN). Non-str keys are already
+    stringified by `json` the same way orjson's OPT_NON_STR_KEYS does.
+    """
+    if hasattr(obj, 'model_dump'):
+        obj = obj.model_dump()
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {k: _normalize(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_normalize(v) for v in obj]
+    return obj
+
+
+def encode_json(data: Any, pretty: bool = True) -> bytes:
+    """
+    Serializes data to UTF-8 JSON bytes, using orjson when available.
+    Both encoders give the same result: non-str keys are stringified and NaN/Infinity
+    are written as null. Pretty output uses a 2-space indent (the only indent orjson
+    supports); compact output is used for NDJSON lines.
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if pretty else 0)
+        return orjson.dumps(data, default=_to_serializable, option=option)
+
+    data = _normalize(data)
+    if pretty:
+        return json.dumps(data, default=_to_serializable, indent=2, allow_nan=False).encode('utf-8')
+    return json.dumps(data, default=_to_serializable, separators=(',', ':'),
+                      allow_nan=False).encode('utf-8')
+
+
+# --- Atomic Writes ---
+
+# Read once at import: os.umask() can only be queried by setting it, which is
+# not safe once the worker thread is running.
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def atomic_write(output_path: str, write_fn: Callable[[Any], None], mode: str = 'wb') -> int:
+    """
+    Writes a file atomically: `write_fn` fills a temp file in the target directory,
+    which is then renamed over `output_path`. Readers never observe a partial artifact.
+
+    Returns: The number of bytes written.
+    """
+    directory = os.path.dirname(output_path) or '.'
+    os.makedirs(directory, exist_ok=True)
+
+    # mkstemp creates the file as 0600; give the artifact the permissions a plain
+    # open() would (or keep those of the file being replaced)
+    try:
+        file_mode = stat.S_IMODE(os.stat(output_path).st_mode)
+    except FileNotFoundError:
+        file_mode = 0o666 & ~_UMASK
+
+    fd, tmp_path = tempfile.mkstemp(
+        dir=directory, prefix=f".{os.path.basename(output_path)}.", suffix='.tmp'
+    )
+    try:
+        # newline='' lets the csv module control line endings in text mode
+        open_kwargs = {'newline': '', 'encoding': 'utf-8'} if 'b' not in mode else {}
+        with os.fdopen(fd, mode, **open_kwargs) as f:
+            write_fn(f)
+            f.flush()
+            os.fsync(f.fileno())
+            os.fchmod(f.fileno(), file_mode)
+            size = os.fstat(f.fileno()).st_size
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    return size
+
+
+# --- Artifact Writers ---
+# Each writer runs on the sink's worker thread and returns the bytes written.
+
+def _write_json(data: Any, output_path: str) -> int:
+    payload = encode_json(data, pretty=True)
+    return atomic_write(output_path, lambda f: f.write(payload))
+
+
+def _write_ndjson(rows: Iterable[Any], output_path: str) -> int:
+    def write_rows(f):
+        for row in rows:
+            f.write(encode_json(row, pretty=False))
+            f.write(b'\n')
+    return atomic_write(output_path, write_rows)
+
+
+def _write_csv(rows: Iterable[Dict[str, Any]], output_path: str,
+               fieldnames: Optional[List[str]]) -> int:
+    def write_rows(f):
+        iterator = iter(rows)
+        columns = fieldnames
+        first = None
+        if columns is None:
+            # Infer the header from the first row so generators can be streamed
+            first = next(iterator, None)
+            columns = list(_to_row(first).keys()) if first is not None else []
+        writer = csv.DictWriter(f, fieldnames=columns, extrasaction='ignore')
+        writer.writeheader()
+        if first is not None:
+            writer.writerow(_to_row(first))
+        for row in iterator:
+            writer.writerow(_to_row(row))
+    return atomic_write(output_path, write_rows, mode='w')
+
+
+def _to_row(row: Any) -> Dict[str, Any]:
+    return row.model_dump() if hasattr(row, 'model_dump') else row
+
+
+# --- The Sink ---
+
+_STOP = object()
+
+
+def _new_stats() -> Dict[str, Any]:
+    return {
+        "artifacts_written": 0,
+        "bytes_written": 0,
+        "io_seconds": 0.0,
+        "per_artifact": {},
+        "errors": [],
+    }
+
+
+class _Worker:
+    """One worker thread with its own queue and stats, retired as a unit by `flush()`."""
+    def __init__(self, max_pending: int):
+        self.queue: "queue.Queue" = queue.Queue(maxsize=max_pending)
+        self.stats = _new_stats()
+        # Daemon, so an idle worker never holds up exit; atexit hooks run before
+        # daemon threads are stopped, so the exit flush still drains the queue
+        self.thread = threading.Thread(target=self._run, name="artifact-sink", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while True:
+            job = self.queue.get()
+            if job is _STOP:
+                return
+
+            output_path, write = job
+            start = time.perf_counter()
+            try:
+                size = write()
+            except BaseException as e:
+                # Never let a writer kill the thread; the error is raised by flush()
+                self.stats["errors"].append(f"Could not write artifact to {output_path}: {str(e)}")
+                continue
+            elapsed = time.perf_counter() - start
+
+            self.stats["artifacts_written"] += 1
+            self.stats["bytes_written"] += size
+            self.stats["io_seconds"] += elapsed
+            # Accumulated per path, so a path written twice is not undercounted
+            entry = self.stats["per_artifact"].setdefault(
+                output_path, {"writes": 0, "bytes": 0, "seconds": 0.0}
+            )
+            entry["writes"] += 1
+            entry["bytes"] += size
+            entry["seconds"] += elapsed
+
+    def drain_unwritten(self):
+        """Records jobs left behind by a worker that is no longer running."""
+        while True:
+            try:
+                job = self.queue.get_nowait()
+            except queue.Empty:
+                return
+            if job is not _STOP:
+                self.stats["errors"].append(f"Could not write artifact to {job[0]}: sink worker stopped")
+
+
+def _put(worker: _Worker, item: Any) -> None:
+    """
+    Queues `item`, blocking while `max_pending` artifacts are waiting (backpressure).
+    Gives up instead of hanging if the worker stops consuming.
+    """
+    while True:
+        try:
+            worker.queue.put(item, timeout=0.1)
+            return
+        except queue.Full:
+            if not worker.thread.is_alive():
+                raise RuntimeError("Artifact sink worker stopped; artifact was not queued.")
+
+
+class ArtifactSink:
+    """
+    Background writer for workflow artifacts (JSON / NDJSON / CSV).
+
+    Nodes hand data off with `submit_*` and return immediately; serialization and
+    disk I/O happen on a single worker thread. `flush()` is called once at the end
+    of the graph to wait for pending writes and report artifact I/O timings
+    separately from agent time. Failed writes make `flush()` raise.
+
+    NOTE: Submitted data is serialized later, so callers must not mutate it after
+    handing it off.
+    """
+    def __init__(self, max_pending: int = 64):
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._worker: Optional[_Worker] = None
+
+    # --- Public API ---
+
+    def submit_json(self, data: Any, output_path: str) -> None:
+        """Queues a single JSON document (dict, list or Pydantic object)."""
+        self._submit(output_path, partial(_write_json, data, output_path))
+
+    def submit_ndjson(self, rows: Iterable[Any], output_path: str) -> None:
+        """Queues a large table as newline-delimited JSON, streamed row by row."""
+        self._submit(output_path, partial(_write_ndjson, rows, output_path))
+
+    def submit_csv(self, rows: Iterable[Dict[str, Any]], output_path: str,
+                   fieldnames: Optional[List[str]] = None) -> None:
+        """Queues a table as CSV, streamed row by row. The header defaults to the first row's keys."""
+        self._submit(output_path, partial(_write_csv, rows, output_path, fieldnames))
+
+    def flush(self) -> Dict[str, Any]:
+        """
+        Blocks until every queued artifact is on disk, stops the worker and
+        returns the I/O statistics collected since the last flush.
+
+        Raises: RuntimeError if any artifact could not be written.
+        """
+        with self._lock:
+            worker = self._worker
+            self._worker = None
+
+        if worker is None:
+            return _new_stats()
+
+        # Only a live worker can consume the stop marker; a dead one with a
+        # full queue would block this put forever.
+        if worker.thread.is_alive():
+            _put(worker, _STOP)
+            worker.thread.join()
+        worker.drain_unwritten()
+        stats = worker.stats
+
+        print(
+            f"--- Artifact Sink: {stats['artifacts_written']} artifacts, "
+            f"{stats['bytes_written']} bytes, {stats['io_seconds']:.3f}s artifact I/O ---"
+        )
+        if stats["errors"]:
+            for error in stats["errors"]:
+                print(f"ERROR: {error}")
+            raise RuntimeError(
+                f"{len(stats['errors'])} artifact(s) failed to write: " + "; ".join(stats["errors"])
+            )
+        return stats
+
+    # --- Hand-off ---
+
+    def _submit(self, output_path: str, write: Callable[[], int]) -> None:
+        with self._lock:
+            if self._worker is None:
+                self._worker = _Worker(self.max_pending)
+            # Put under the lock so flush() never detaches a worker mid-handoff
+            _put(self._worker, (output_path, write))
+
+
+def _flush_at_exit(sink: ArtifactSink) -> None:
+    """
+    Exit hook for artifacts that were never flushed. Exceptions raised in atexit
+    callbacks are ignored by the interpreter, so a failed write ends the process
+    with status 1 instead.
+    """
+    try:
+        sink.flush()
+    except RuntimeError:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os._exit(1)
+
+
+# Shared sink used by the workflow nodes. No graph in this tree runs
+# `artifacts_node` yet, so the exit hook is what flushes it in practice.
+artifact_sink = ArtifactSink()
+atexit.register(_flush_at_exit, artifact_sink)
@@ -5,6 +5,7 @@ import json
 import os
 from langchain_core.tools import tool
 from typing import Dict, Any
+from app.tools.artifact_sink import atomic_write
 
 # --- Tool 1: Reading and Filtering Catalog Data ---
 
@@ -59,15 +60,12 @@ def write_json_output(data: Dict[str, Any], output_path: str) -> str:
     at the specified output path. Used for saving the final selection list.
     """
     try:
-        # Ensure the directory structure exists
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        
         # Handle Pydantic objects by converting them to a dictionary if necessary
         if hasattr(data, 'model_dump'):
             data = data.model_dump()
         
-        with open(output_path, 'w') as f:
-            json.dump(data, f, indent=4)
+        # Temp file + rename: a failed call never leaves a truncated file behind
+        atomic_write(output_path, lambda f: json.dump(data, f, indent=4), mode='w')
             
         # The tool MUST return a success confirmation string to the LLM
         return f"SUCCESS: JSON data written to {output_path}"
@@ -1,8 +1,10 @@
 # --- Inside app/workflow/ops_graph.py ---
+import copy
 import json
 import os
 from app.agents.Product_Sourcing_Agent import ProductSourcingAgent
 from app.tools.data_tools import read_catalog_tool, write_json_output
+from app.tools.artifact_sink import artifact_sink
 from app.core.llm_provider import LLMProvider
 from tests.app.agents.Listing_Agent import ListingAgent
 from tests.app.agents.Manager_Agent import ManagerAgent, ManagerState
@@ -40,8 +42,10 @@ def sourcing_node(state:ManagerState, config: RunnableConfig):
         },
         config=config
     )
+    # Hand off to the background sink; the node does not wait for disk I/O.
+    # The sink gets its own copy because selected_products stays in the state.
     sourcing_path = os.path.join(state["output_dir"], "selection.json")
-    write_json_output(result.selected_products, sourcing_path)
+    artifact_sink.submit_json(copy.deepcopy(result.selected_products), sourcing_path)
 
     state.selected_skus = result.selected_products
     state.messages.append({
@@ -86,9 +90,9 @@ def listing_node(state: ManagerState, agent_instance: ListingAgent):
         "product_data_json": json.dumps(input_data)
     })
     
-    # 3. Save Output Artifact
+    # 3. Save Output Artifact (written in the background, flushed by artifacts_node)
     listing_path = os.path.join(state["output_dir"], "listings.json")
-    write_json_output(result, listing_path)
+    artifact_sink.submit_json(result, listing_path)
 
     state.messages.append({
         "name":"listing_agent",
@@ -97,5 +101,18 @@ def listing_node(state: ManagerState, agent_instance: ListingAgent):
     return state
 
 
+def artifacts_node(state: ManagerState):
+    """
+    Final LangGraph node: waits for all queued artifacts to be written and
+    records the artifact I/O time separately from the agent nodes.
+    A failed artifact write raises here and fails the run.
+    """
+    print("\n--- Running Node: Artifact Sink (Flush) ---")
 
+    stats = artifact_sink.flush()
 
+    state.messages.append({
+        "name":"artifact_sink",
+        "content":f"Wrote {stats['artifacts_written']} artifacts in {stats['io_seconds']:.3f}s of artifact I/O."
+    })
+    return state
@@ -0,0 +1,201 @@
+# tests/test_artifact_sink.py
+
+import csv
+import json
+import math
+import os
+import stat
+import threading
+import pytest
+from app.tools import artifact_sink as artifact_sink_module
+from app.tools.artifact_sink import ArtifactSink, encode_json
+
+
+# Run every sink test against both the orjson fast path and the stdlib fallback
+@pytest.fixture(params=["orjson", "json"])
+def encoder(request, monkeypatch):
+    if request.param == "orjson":
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(artifact_sink_module, "orjson", None)
+    return request.param
+
+
+@pytest.fixture
+def sink(encoder):
+    sink = ArtifactSink()
+    yield sink
+    sink.flush()
+
+
+def test_artifact_sink_writes_all_formats(sink, tmp_path):
+    """
+    Tests that JSON, NDJSON and CSV artifacts are written in the background,
+    are complete after flush(), and that artifact I/O is measured.
+    """
+    listings = {"listings": [{"supplier_sku": "SKU001", "shopify_title": "Premium Widget"}]}
+    rows = [{"supplier_sku": f"SKU{i:03d}", "stock_level": i, "action": "SYNC_UPDATE"} for i in range(100)]
+
+    sink.submit_json(listings, str(tmp_path / "listings.json"))
+    sink.submit_ndjson(iter(rows), str(tmp_path / "routing.ndjson"))
+    sink.submit_csv((row for row in rows), str(tmp_path / "stock_update.csv"))
+    stats = sink.flush()
+
+    # V1: Every artifact landed, with timings recorded separately
+    assert stats["errors"] == []
+    assert stats["artifacts_written"] == 3
+    assert stats["io_seconds"] > 0
+    assert set(stats["per_artifact"]) == {
+        str(tmp_path / name) for name in ("listings.json", "routing.ndjson", "stock_update.csv")
+    }
+
+    # V2: Contents round-trip; NDJSON lines are compact
+    with open(tmp_path / "listings.json") as f:
+        assert json.load(f) == listings
+    with open(tmp_path / "routing.ndjson") as f:
+        lines = f.read().splitlines()
+    assert [json.loads(line) for line in lines] == rows
+    assert lines[0] == '{"supplier_sku":"SKU000","stock_level":0,"action":"SYNC_UPDATE"}'
+    with open(tmp_path / "stock_update.csv", newline="") as f:
+        written = list(csv.DictReader(f))
+    assert len(written) == 100
+    assert written[5] == {"supplier_sku": "SKU005", "stock_level": "5", "action": "SYNC_UPDATE"}
+
+    # V3: No temp files are left next to the artifacts
+    assert sorted(os.listdir(tmp_path)) == ["listings.json", "routing.ndjson", "stock_update.csv"]
+
+
+def test_encode_json_matches_across_encoders(encoder):
+    """
+    Int keys (e.g. a pandas index) and NaN/Infinity (missing catalog fields)
+    encode the same way whether or not orjson is installed.
+    """
+    data = {1: "a", "p": math.nan, "rows": [math.inf, 2.5, {"q": -math.inf}]}
+    expected = {"1": "a", "p": None, "rows": [None, 2.5, {"q": None}]}
+
+    assert json.loads(encode_json(data, pretty=True)) == expected
+    assert encode_json(data, pretty=False) == b'{"1":"a","p":null,"rows":[null,2.5,{"q":null}]}'
+
+
+def test_artifact_sink_file_permissions(sink, tmp_path):
+    """Artifacts get the same mode as a plain open() would give, or keep the replaced file's mode."""
+    plain_path = tmp_path / "plain.json"
+    with open(plain_path, "w") as f:
+        f.write("{}")
+    kept_path = tmp_path / "kept.csv"
+    kept_path.write_text("old")
+    os.chmod(kept_path, 0o640)
+
+    sink.submit_json({"a": 1}, str(tmp_path / "x.json"))
+    sink.submit_csv([{"a": 1}], str(kept_path))
+    sink.flush()
+
+    mode = lambda path: stat.S_IMODE(os.stat(path).st_mode)
+    assert mode(tmp_path / "x.json") == mode(plain_path)
+    assert mode(kept_path) == 0o640
+
+
+def test_artifact_sink_stats_for_repeated_path(sink, tmp_path):
+    """Writing the same path twice is counted twice, with bytes taken from each write."""
+    output_path = str(tmp_path / "stock_update.ndjson")
+    sink.submit_ndjson([{"a": 1}], output_path)
+    sink.submit_ndjson([{"a": 1}, {"a": 2}], output_path)
+    stats = sink.flush()
+
+    assert stats["artifacts_written"] == 2
+    assert stats["bytes_written"] == len(b'{"a":1}\n') * 3
+    assert stats["per_artifact"][output_path]["writes"] == 2
+    assert stats["per_artifact"][output_path]["bytes"] == stats["bytes_written"]
+
+
+def test_artifact_sink_serializes_pydantic_models(sink, tmp_path):
+    """Pydantic objects (as returned by the agents) are accepted by every submit_* method."""
+    pydantic = pytest.importorskip("pydantic")
+
+    class StockUpdate(pydantic.BaseModel):
+        supplier_sku: str
+        stock_level: int
+
+    class StockUpdateList(pydantic.BaseModel):
+        updates: list
+
+    updates = [StockUpdate(supplier_sku="SKU001", stock_level=50),
+               StockUpdate(supplier_sku="SKU003", stock_level=20)]
+    expected = [update.model_dump() for update in updates]
+
+    sink.submit_json(StockUpdateList(updates=updates), str(tmp_path / "updates.json"))
+    sink.submit_ndjson(updates, str(tmp_path / "updates.ndjson"))
+    sink.submit_csv(updates, str(tmp_path / "updates.csv"))
+    sink.flush()
+
+    with open(tmp_path / "updates.json") as f:
+        assert json.load(f) == {"updates": expected}
+    with open(tmp_path / "updates.ndjson") as f:
+        assert [json.loads(line) for line in f] == expected
+    with open(tmp_path / "updates.csv", newline="") as f:
+        assert list(csv.DictReader(f)) == [
+            {"supplier_sku": "SKU001", "stock_level": "50"},
+            {"supplier_sku": "SKU003", "stock_level": "20"},
+        ]
+
+
+def test_artifact_sink_failed_write_is_not_swallowed(sink, tmp_path):
+    """
+    A failing write makes flush() raise, so the end-of-graph flush fails the run,
+    and the previous artifact is never truncated.
+    """
+    output_path = str(tmp_path / "selection.json")
+    sink.submit_json({"selected_products": []}, output_path)
+    sink.flush()
+
+    sink.submit_json({"bad": object()}, output_path)
+    sink.submit_json({"listings": []}, str(tmp_path / "listings.json"))
+    with pytest.raises(RuntimeError, match="selection.json"):
+        sink.flush()
+
+    # Later artifacts are still written, the failed one keeps its old content
+    with open(output_path) as f:
+        assert json.load(f) == {"selected_products": []}
+    assert sorted(os.listdir(tmp_path)) == ["listings.json", "selection.json"]
+
+
+def test_artifact_sink_flush_during_concurrent_submits(sink, tmp_path):
+    """Artifacts submitted while another thread flushes are counted exactly once."""
+    total = 200
+    written = []
+
+    def submit_all():
+        for i in range(total):
+            sink.submit_json({"i": i}, str(tmp_path / f"{i}.json"))
+
+    producer = threading.Thread(target=submit_all)
+    producer.start()
+    while producer.is_alive():
+        written.append(sink.flush()["artifacts_written"])
+    producer.join()
+    written.append(sink.flush()["artifacts_written"])
+
+    assert sum(written) == total
+    assert len(os.listdir(tmp_path)) == total
+
+
+def test_write_json_output_tool(tmp_path):
+    """The synchronous LLM tool reports success and writes 4-space indented JSON."""
+    pytest.importorskip("pandas")
+    pytest.importorskip("langchain_core")
+    from app.tools.data_tools import write_json_output
+
+    output_path = str(tmp_path / "out" / "test_selection.json")
+    data = {"selected_products": [{"supplier_sku": "SKU001"}]}
+
+    result = write_json_output.invoke({"data": data, "output_path": output_path})
+
+    assert result == f"SUCCESS: JSON data written to {output_path}"
+    with open(output_path) as f:
+        text = f.read()
+    assert json.loads(text) == data
+    assert text == json.dumps(data, indent=4)
+    plain_path = tmp_path / "plain.json"
+    plain_path.write_text("{}")
+    assert os.stat(output_path).st_mode == os.stat(plain_path).st_mode
+    assert os.listdir(tmp_path / "out") == ["test_selection.json"]